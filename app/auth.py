@@ -1,25 +1,74 @@
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import cache
 from app.config import settings
 from app.database import get_db
 from app.models import User
-from app.schemas import TokenData
+from app.schemas import TokenData, User as UserSchema
+
+# Argon2id with tuned costs; bcrypt is only kept to verify hashes created before the switch
+password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+legacy_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Hashing is CPU-bound, so it runs in worker processes to keep the event loop free.
+# The pool is started in the application lifespan; until then hashing uses the default executor.
+hash_pool: Optional[ProcessPoolExecutor] = None
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/auth/login")
 
 
+def start_hash_pool():
+    global hash_pool
+    # forkserver avoids forking a uvicorn process that already has threads running;
+    # it isn't available on Windows, where spawn is the safe equivalent
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    hash_pool = ProcessPoolExecutor(
+        max_workers=settings.password_hash_workers,
+        mp_context=multiprocessing.get_context(start_method),
+    )
+
+
+def shutdown_hash_pool():
+    global hash_pool
+    if hash_pool is not None:
+        hash_pool.shutdown()
+        hash_pool = None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if not hashed_password.startswith("$argon2"):
+        return legacy_pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_pool, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_pool, get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -28,7 +77,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -39,26 +88,42 @@ def verify_token(token: str, credentials_exception):
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, jti=payload.get("jti"), exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
     return token_data
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> UserSchema:
+    # Always returns the schema, never the ORM row, so cached and uncached requests behave the same
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     token_data = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    if token_data.jti:
+        cached_user = await cache.get(cache.session_key(token_data.jti))
+        if cached_user is not None:
+            return UserSchema.model_validate_json(cached_user)
+    
+    user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
         raise credentials_exception
-    return user
+    current_user = UserSchema.model_validate(user)
+    
+    # Only serialize the user when there's a cache to put it in
+    if cache.redis is not None and token_data.jti and token_data.exp:
+        ttl = token_data.exp - int(time.time())
+        if ttl > 0:
+            body = current_user.model_dump_json().encode()
+            await cache.set_session(token_data.jti, current_user.id, body, ttl)
+    return current_user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: UserSchema = Depends(get_current_user)) -> UserSchema:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
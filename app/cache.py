@@ -0,0 +1,110 @@
+from typing import Optional
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.config import settings
+
+# Set up in the application lifespan; the cache is bypassed while it's None
+redis: Optional[Redis] = None
+
+PUBLIC_NOTES_VERSION_KEY = "pub:notes:v"
+
+
+async def init_cache():
+    global redis
+    if settings.redis_url:
+        redis = Redis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=settings.redis_connect_timeout,
+            socket_timeout=settings.redis_timeout,
+        )
+
+
+async def close_cache():
+    global redis
+    if redis is not None:
+        await redis.close()
+        redis = None
+
+
+# Cache operations fail open: a Redis outage degrades to hitting the database
+async def get(key: str) -> Optional[bytes]:
+    if redis is None:
+        return None
+    try:
+        return await redis.get(key)
+    except RedisError:
+        return None
+
+
+async def set(key: str, value: bytes, ttl: int):
+    if redis is None:
+        return
+    try:
+        await redis.set(key, value, ex=ttl)
+    except RedisError:
+        pass
+
+
+def public_note_version_key(note_id: int) -> str:
+    return f"pub:note:v:{note_id}"
+
+
+async def public_note_key(note_id: int) -> str:
+    # Readers fetch the version before loading the note and writers bump it after
+    # committing, so a reader that loaded a note just before it went private writes
+    # its body under a version nobody reads anymore. The only remaining window is
+    # Redis evicting the version key itself (avoid allkeys-* eviction policies).
+    version = await get(public_note_version_key(note_id))
+    return f"pub:note:{note_id}:{int(version or 0)}"
+
+
+async def public_notes_key(after_id: Optional[int], limit: int) -> str:
+    # Embedding the version lets one INCR invalidate every cached page
+    version = await get(PUBLIC_NOTES_VERSION_KEY)
+    return f"pub:notes:{int(version or 0)}:{after_id or ''}:{limit}"
+
+
+async def invalidate_public_note(note_id: int):
+    if redis is None:
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.incr(public_note_version_key(note_id))
+            # Outlive any body cached under the previous version
+            pipe.expire(public_note_version_key(note_id), settings.public_note_cache_ttl * 10)
+            pipe.incr(PUBLIC_NOTES_VERSION_KEY)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+def session_key(jti: str) -> str:
+    return f"sess:{jti}"
+
+
+def user_sessions_key(user_id: int) -> str:
+    return f"sess:user:{user_id}"
+
+
+async def set_session(jti: str, user_id: int, value: bytes, ttl: int):
+    if redis is None:
+        return
+    try:
+        # Track each user's cached tokens so they can be dropped when the user changes
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(session_key(jti), value, ex=ttl)
+            pipe.sadd(user_sessions_key(user_id), jti)
+            pipe.expire(user_sessions_key(user_id), settings.access_token_expire_minutes * 60)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+async def invalidate_user_sessions(user_id: int):
+    if redis is None:
+        return
+    try:
+        jtis = await redis.smembers(user_sessions_key(user_id))
+        await redis.delete(user_sessions_key(user_id), *(session_key(jti.decode()) for jti in jtis))
+    except RedisError:
+        pass
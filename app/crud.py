@@ -1,186 +1,226 @@
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from app import cache
 from app.models import User, Note
 from app.schemas import UserCreate, UserUpdate, NoteCreate, NoteUpdate
-from app.auth import get_password_hash, verify_password
+from app.auth import get_password_hash_async, verify_password_async
 from typing import List, Optional
 
 
-# User CRUD operations
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
-
-
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    return db.query(User).filter(User.username == username).first()
+# Columns exposed by the Note and NoteSummary schemas; list queries load nothing else
+NOTE_LIST_COLUMNS = (
+    Note.id, Note.title, Note.content, Note.is_public, Note.owner_id, Note.created_at, Note.updated_at
+)
+NOTE_SUMMARY_COLUMNS = (Note.id, Note.title, Note.is_public, Note.created_at)
 
 
-def create_user(db: Session, user: UserCreate) -> User:
-    # Check for existing user with same email or username
-    if get_user_by_email(db, user.email):
+@asynccontextmanager
+async def safe_commit(db: AsyncSession, detail: str):
+    """Commit the statements run in the block, turning constraint violations into a 400."""
+    try:
+        yield
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=detail
         )
-    if get_user_by_username(db, user.username):
+
+
+# User CRUD operations
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.username == username))
+
+
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
+    # Hash before the first query: AsyncSession checks out a connection lazily, so
+    # none is held from the pool while the hash is computed
+    hashed_password = await get_password_hash_async(user.password)
+    
+    # Check for existing user with same email or username in a single query; at most
+    # two rows match, and an email clash is reported first regardless of row order
+    existing = (await db.execute(
+        select(User.email).where(
+            or_(User.email == user.email, User.username == user.username)
+        )
+    )).scalars().all()
+    if existing:
+        if user.email in existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_password
-    )
-    
-    try:
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User creation failed due to constraint violation"
+    async with safe_commit(db, "User creation failed due to constraint violation"):
+        # RETURNING fills server-generated columns without a follow-up SELECT
+        result = await db.execute(
+            insert(User).values(
+                email=user.email,
+                username=user.username,
+                hashed_password=hashed_password
+            ).returning(User)
         )
+        db_user = result.scalar_one()
+    return db_user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    user = get_user_by_username(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate) -> User:
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -> User:
+    update_data = user_update.model_dump(exclude_unset=True)
     
-    update_data = user_update.dict(exclude_unset=True)
-    
-    # Hash password if provided
+    # Hash password if provided, before any query checks out a connection
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
     
-    # Check for unique constraints
+    # Uniqueness checks select only ids: a loaded User for user_id would sit in the
+    # identity map and the UPDATE ... RETURNING below would hand back that stale
+    # object (without the new updated_at) instead of the returned row
     if "email" in update_data:
-        existing_user = get_user_by_email(db, update_data["email"])
-        if existing_user and existing_user.id != user_id:
+        if await db.scalar(select(User.id).where(User.email == update_data["email"], User.id != user_id)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
     
     if "username" in update_data:
-        existing_user = get_user_by_username(db, update_data["username"])
-        if existing_user and existing_user.id != user_id:
+        if await db.scalar(select(User.id).where(User.username == update_data["username"], User.id != user_id)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
             )
     
-    try:
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
-    except IntegrityError:
-        db.rollback()
+    if not update_data:
+        db_user = await db.get(User, user_id)
+    else:
+        async with safe_commit(db, "User update failed due to constraint violation"):
+            result = await db.execute(
+                update(User).where(User.id == user_id).values(**update_data).returning(User)
+            )
+            db_user = result.scalar_one_or_none()
+    
+    if not db_user:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User update failed due to constraint violation"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
+    
+    # Cached sessions hold the old credentials/profile, so force a reload
+    await cache.invalidate_user_sessions(user_id)
+    return db_user
 
 
 # Note CRUD operations
-def get_note(db: Session, note_id: int, user_id: int) -> Optional[Note]:
-    return db.query(Note).filter(
-        Note.id == note_id,
-        Note.owner_id == user_id
-    ).first()
-
-
-def get_public_note(db: Session, note_id: int) -> Optional[Note]:
-    return db.query(Note).filter(
-        Note.id == note_id,
-        Note.is_public == True
-    ).first()
-
-
-def get_user_notes(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
-    return db.query(Note).filter(Note.owner_id == user_id).offset(skip).limit(limit).all()
-
-
-def get_public_notes(db: Session, skip: int = 0, limit: int = 100) -> List[Note]:
-    return db.query(Note).filter(Note.is_public == True).offset(skip).limit(limit).all()
-
-
-def create_note(db: Session, note: NoteCreate, user_id: int) -> Note:
-    db_note = Note(**note.dict(), owner_id=user_id)
-    
-    try:
-        db.add(db_note)
-        db.commit()
-        db.refresh(db_note)
-        return db_note
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Note creation failed"
+# Primary-key lookups go through db.get(), which returns an object already in the
+# session's identity map without a query; access rules are then checked in Python.
+# Mutations don't preload through these helpers: an identity-mapped instance makes
+# UPDATE ... RETURNING return that object unchanged instead of the returned row.
+async def get_note(db: AsyncSession, note_id: int, user_id: int) -> Optional[Note]:
+    note = await db.get(Note, note_id)
+    return note if note and note.owner_id == user_id else None
+
+
+async def get_accessible_note(db: AsyncSession, note_id: int, user_id: int) -> Optional[Note]:
+    note = await db.get(Note, note_id)
+    return note if note and (note.owner_id == user_id or note.is_public) else None
+
+
+async def get_user_notes(
+    db: AsyncSession, user_id: int, after_id: Optional[int] = None, limit: int = 100, summary: bool = False
+) -> List[Note]:
+    # Keyset pagination: newest first, continuing below the last ID the client saw
+    columns = NOTE_SUMMARY_COLUMNS if summary else NOTE_LIST_COLUMNS
+    query = select(Note).options(load_only(*columns, raiseload=True)).where(Note.owner_id == user_id)
+    if after_id is not None:
+        query = query.where(Note.id < after_id)
+    query = query.order_by(Note.id.desc()).limit(limit)
+    result = await db.scalars(query)
+    return list(result)
+
+
+async def get_public_notes(
+    db: AsyncSession, after_id: Optional[int] = None, limit: int = 100
+) -> List[Note]:
+    query = select(Note).options(load_only(*NOTE_LIST_COLUMNS, raiseload=True)).where(Note.is_public == True)
+    if after_id is not None:
+        query = query.where(Note.id < after_id)
+    query = query.order_by(Note.id.desc()).limit(limit)
+    result = await db.scalars(query)
+    return list(result)
+
+
+async def create_note(db: AsyncSession, note: NoteCreate, user_id: int) -> Note:
+    async with safe_commit(db, "Note creation failed"):
+        result = await db.execute(
+            insert(Note).values(**note.model_dump(), owner_id=user_id).returning(Note)
         )
-
-
-def update_note(db: Session, note_id: int, note_update: NoteUpdate, user_id: int) -> Note:
-    db_note = get_note(db, note_id, user_id)
+        db_note = result.scalar_one()
+    
+    if db_note.is_public:
+        await cache.invalidate_public_note(db_note.id)
+    return db_note
+
+
+async def update_note(db: AsyncSession, note_id: int, note_update: NoteUpdate, user_id: int) -> Note:
+    update_data = note_update.model_dump(exclude_unset=True)
+    if not update_data:
+        db_note = await get_note(db, note_id, user_id)
+    else:
+        # Ownership is part of the WHERE clause, so no SELECT is needed before the UPDATE
+        async with safe_commit(db, "Note update failed"):
+            result = await db.execute(
+                update(Note)
+                .where(Note.id == note_id, Note.owner_id == user_id)
+                .values(**update_data)
+                .returning(Note)
+                .execution_options(synchronize_session=False)
+            )
+            db_note = result.scalar_one_or_none()
+    
     if not db_note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    update_data = note_update.dict(exclude_unset=True)
-    
-    try:
-        for field, value in update_data.items():
-            setattr(db_note, field, value)
-        db.commit()
-        db.refresh(db_note)
-        return db_note
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Note update failed"
+    # A note that is public now, or whose visibility just changed, may be cached
+    if db_note.is_public or "is_public" in update_data:
+        await cache.invalidate_public_note(note_id)
+    return db_note
+
+
+async def delete_note(db: AsyncSession, note_id: int, user_id: int) -> bool:
+    async with safe_commit(db, "Note deletion failed"):
+        result = await db.execute(
+            delete(Note)
+            .where(Note.id == note_id, Note.owner_id == user_id)
+            .returning(Note.is_public)
+            .execution_options(synchronize_session=False)
         )
-
-
-def delete_note(db: Session, note_id: int, user_id: int) -> bool:
-    db_note = get_note(db, note_id, user_id)
-    if not db_note:
+        deleted = result.first()
+    
+    if deleted is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    try:
-        db.delete(db_note)
-        db.commit()
-        return True
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Note deletion failed"
-        )
+    if deleted.is_public:
+        await cache.invalidate_public_note(note_id)
+    return True
@@ -1,27 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app import cache
+from app.auth import start_hash_pool, shutdown_hash_pool
+from app.middleware import StaticCORSMiddleware
 from app.routers import auth, notes
 from app.config import settings
 from app.database import engine
 from app.models import Base
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await cache.init_cache()
+    start_hash_pool()
+    yield
+    shutdown_hash_pool()
+    await cache.close_cache()
+    await engine.dispose()
+
 
 app = FastAPI(
     title="Notes API",
     description="A minimal CRUD API for notes with authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware; any origin, no credentials (auth uses bearer tokens, not cookies)
+app.add_middleware(StaticCORSMiddleware)
+
+# Compress larger responses (mostly note lists); small bodies aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Include routers
 app.include_router(
@@ -37,15 +52,20 @@ app.include_router(
 )
 
 
+# Static bodies are encoded once at import instead of on every probe
+_ROOT_RESPONSE = ORJSONResponse({
+    "message": "Welcome to Notes API",
+    "docs": "/docs",
+    "redoc": "/redoc"
+})
+_HEALTH_RESPONSE = ORJSONResponse({"status": "healthy"})
+
+
 @app.get("/")
-def read_root():
-    return {
-        "message": "Welcome to Notes API",
-        "docs": "/docs",
-        "redoc": "/redoc"
-    }
+async def read_root():
+    return _ROOT_RESPONSE
 
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+async def health_check():
+    return _HEALTH_RESPONSE
@@ -0,0 +1,53 @@
+from typing import Iterable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class StaticCORSMiddleware:
+    """
+    CORS for a public API that allows any origin without credentials.
+    
+    Nothing depends on the request origin, so the headers are encoded once and
+    appended to every response, and preflight requests get a prebuilt 204.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_methods: Iterable[str] = ("GET", "POST", "PUT", "DELETE", "OPTIONS"),
+        max_age: int = 600,
+    ):
+        self.app = app
+        self.response_headers = [(b"access-control-allow-origin", b"*")]
+        self.preflight_headers = [
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode()),
+            (b"access-control-max-age", str(max_age).encode()),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS":
+            request_headers = dict(scope["headers"])
+            if b"access-control-request-method" in request_headers:
+                await self.preflight(request_headers, send)
+                return
+        
+        async def send_with_cors(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + self.response_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+    async def preflight(self, request_headers: dict, send: Send):
+        # "*" doesn't cover Authorization, so echo back the headers the browser asked for
+        allow_headers = request_headers.get(b"access-control-request-headers", b"*")
+        await send({
+            "type": "http.response.start",
+            "status": 204,
+            "headers": self.preflight_headers + [(b"access-control-allow-headers", allow_headers)],
+        })
+        await send({"type": "http.response.body", "body": b""})
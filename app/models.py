@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -16,7 +16,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship
-    notes = relationship("Note", back_populates="owner", cascade="all, delete-orphan")
+    notes = relationship("Note", back_populates="owner", cascade="all, delete-orphan", lazy="raise")
 
 
 class Note(Base):
@@ -30,5 +30,10 @@ class Note(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Relationship
-    owner = relationship("User", back_populates="notes")
+    # Relationship; load explicitly (e.g. selectinload) so serialization can't trigger N+1 queries
+    owner = relationship("User", back_populates="notes", lazy="raise")
+
+
+# Indexes matching the note listing queries: a user's notes newest first, and public notes only
+Index("ix_notes_owner_id_id", Note.owner_id, Note.id.desc())
+Index("ix_notes_public_id", Note.id.desc(), postgresql_where=Note.is_public)
@@ -1,10 +1,10 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.auth import create_access_token, authenticate_user
-from app.crud import create_user
+from app.auth import create_access_token
+from app.crud import create_user, authenticate_user
 from app.schemas import UserCreate, User, Token
 from app.config import settings
 
@@ -12,7 +12,7 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Register a new user.
     
@@ -20,18 +20,18 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     attempting to register with an existing email or username will return an error
     rather than creating duplicate accounts.
     """
-    return create_user(db=db, user=user)
+    return await create_user(db=db, user=user)
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
     Login to get access token.
     
     Returns a JWT token that can be used for authenticated requests.
     The token expires after 30 minutes by default.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,22 +1,48 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import cache
+from app.config import settings
 from app.database import get_db
 from app.auth import get_current_active_user
 from app.crud import (
-    get_note, get_public_note, get_user_notes, get_public_notes,
+    get_accessible_note, get_user_notes, get_public_notes,
     create_note, update_note, delete_note
 )
-from app.schemas import Note, NoteCreate, NoteUpdate, Message
-from app.models import User
+from app.schemas import Note, NotePage, NoteSummaryPage, NoteCreate, NoteUpdate, Message, User
 
 router = APIRouter()
 
+# Built once at import so responses are validated and dumped by pydantic-core directly
+_NOTE = TypeAdapter(Note)
+_NOTE_PAGE = TypeAdapter(NotePage)
+_NOTE_SUMMARY_PAGE = TypeAdapter(NoteSummaryPage)
+
+
+def _note_page(notes: List, limit: int) -> dict:
+    # A short page means there is nothing left to fetch
+    next_cursor = notes[-1].id if len(notes) == limit else None
+    return {"items": notes, "next_cursor": next_cursor}
+
+
+def _note_response(note, status_code: int = status.HTTP_200_OK) -> Response:
+    # Every note response goes through pydantic-core, so timestamps are formatted
+    # identically whether they come from a list page, the cache or a single note
+    body = _NOTE.dump_json(_NOTE.validate_python(note, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def _dump_page(adapter: TypeAdapter, notes: List, limit: int) -> bytes:
+    # One validation pass from the ORM rows, then pydantic-core writes JSON bytes directly
+    page = adapter.validate_python(_note_page(notes, limit), from_attributes=True)
+    return adapter.dump_json(page)
+
 
 @router.post("/", response_model=Note, status_code=status.HTTP_201_CREATED)
-def create_user_note(
+async def create_user_note(
     note: NoteCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -24,45 +50,56 @@ def create_user_note(
     
     The note will be associated with the current user's account.
     """
-    return create_note(db=db, note=note, user_id=current_user.id)
+    db_note = await create_note(db=db, note=note, user_id=current_user.id)
+    return _note_response(db_note, status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/", response_model=List[Note])
-def read_user_notes(
-    skip: int = Query(0, ge=0, description="Number of notes to skip"),
+@router.get("/", response_model=Union[NotePage, NoteSummaryPage])
+async def read_user_notes(
+    after_id: Optional[int] = Query(None, ge=1, description="Return notes older than this ID (next_cursor of the previous page)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of notes to return"),
-    db: Session = Depends(get_db),
+    summary: bool = Query(False, description="Return only id, title, is_public and created_at"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get all notes for the authenticated user.
     
-    Supports pagination with skip and limit parameters.
+    Notes are returned newest first. Pass the returned next_cursor as after_id
+    to fetch the following page. With summary=true the note content is left
+    out, which keeps list views small.
     """
-    notes = get_user_notes(db, user_id=current_user.id, skip=skip, limit=limit)
-    return notes
+    notes = await get_user_notes(db, user_id=current_user.id, after_id=after_id, limit=limit, summary=summary)
+    # Returning a Response skips FastAPI's second response_model validation pass
+    adapter = _NOTE_SUMMARY_PAGE if summary else _NOTE_PAGE
+    return Response(content=_dump_page(adapter, notes, limit), media_type="application/json")
 
 
-@router.get("/public", response_model=List[Note])
-def read_public_notes(
-    skip: int = Query(0, ge=0, description="Number of notes to skip"),
+@router.get("/public", response_model=NotePage)
+async def read_public_notes(
+    after_id: Optional[int] = Query(None, ge=1, description="Return notes older than this ID (next_cursor of the previous page)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of notes to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all public notes.
     
     This endpoint doesn't require authentication and returns notes
-    that have been marked as public by their owners.
+    that have been marked as public by their owners, newest first.
     """
-    notes = get_public_notes(db, skip=skip, limit=limit)
-    return notes
+    key = await cache.public_notes_key(after_id, limit)
+    body = await cache.get(key)
+    if body is None:
+        notes = await get_public_notes(db, after_id=after_id, limit=limit)
+        body = _dump_page(_NOTE_PAGE, notes, limit)
+        await cache.set(key, body, settings.public_notes_cache_ttl)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{note_id}", response_model=Note)
-def read_note(
+async def read_note(
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -70,15 +107,17 @@ def read_note(
     
     Users can only access their own notes or public notes.
     """
-    # First try to get user's own note
-    note = get_note(db, note_id=note_id, user_id=current_user.id)
-    if note:
-        return note
+    key = await cache.public_note_key(note_id)
+    body = await cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
     
-    # If not found, try to get public note
-    note = get_public_note(db, note_id=note_id)
+    note = await get_accessible_note(db, note_id=note_id, user_id=current_user.id)
     if note:
-        return note
+        response = _note_response(note)
+        if note.is_public:
+            await cache.set(key, response.body, settings.public_note_cache_ttl)
+        return response
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -87,10 +126,10 @@ def read_note(
 
 
 @router.put("/{note_id}", response_model=Note)
-def update_user_note(
+async def update_user_note(
     note_id: int,
     note_update: NoteUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -99,13 +138,14 @@ def update_user_note(
     Users can only update their own notes. The operation is idempotent -
     multiple identical requests will produce the same result.
     """
-    return update_note(db=db, note_id=note_id, note_update=note_update, user_id=current_user.id)
+    db_note = await update_note(db=db, note_id=note_id, note_update=note_update, user_id=current_user.id)
+    return _note_response(db_note)
 
 
 @router.delete("/{note_id}", response_model=Message)
-def delete_user_note(
+async def delete_user_note(
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -114,5 +154,5 @@ def delete_user_note(
     Users can only delete their own notes. The operation is idempotent -
     attempting to delete a non-existent note will return a 404 error.
     """
-    delete_note(db=db, note_id=note_id, user_id=current_user.id)
+    await delete_note(db=db, note_id=note_id, user_id=current_user.id)
     return {"message": "Note deleted successfully"}
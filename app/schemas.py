@@ -1,11 +1,35 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+import re
+from pydantic import BaseModel, BeforeValidator, ConfigDict
+from typing import Any, Optional, List
+from typing_extensions import Annotated
 from datetime import datetime
+from email_validator import EmailNotValidError, validate_email
+
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def _fast_email(value: Any) -> Any:
+    # Plain ASCII addresses are checked with a regex; email-validator's IDNA
+    # normalization is only worth its cost for internationalized addresses
+    if not isinstance(value, str):
+        return value
+    if value.isascii():
+        if not _EMAIL_RE.fullmatch(value):
+            raise ValueError("value is not a valid email address")
+        local_part, _, domain = value.rpartition("@")
+        return f"{local_part}@{domain.lower()}"
+    try:
+        return validate_email(value, check_deliverability=False).normalized
+    except EmailNotValidError as e:
+        raise ValueError(f"value is not a valid email address: {e}")
+
+
+AsciiEmail = Annotated[str, BeforeValidator(_fast_email)]
 
 
 # User schemas
 class UserBase(BaseModel):
-    email: EmailStr
+    email: AsciiEmail
     username: str
 
 
@@ -14,7 +38,7 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(BaseModel):
-    email: Optional[EmailStr] = None
+    email: Optional[AsciiEmail] = None
     username: Optional[str] = None
     password: Optional[str] = None
 
@@ -25,8 +49,7 @@ class User(UserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Note schemas
@@ -52,14 +75,32 @@ class Note(NoteBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NoteWithOwner(Note):
     owner: User
 
 
+class NoteSummary(BaseModel):
+    id: int
+    title: str
+    is_public: bool
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NotePage(BaseModel):
+    items: List[Note]
+    next_cursor: Optional[int] = None
+
+
+class NoteSummaryPage(BaseModel):
+    items: List[NoteSummary]
+    next_cursor: Optional[int] = None
+
+
 # Auth schemas
 class Token(BaseModel):
     access_token: str
@@ -68,6 +109,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    jti: Optional[str] = None
+    exp: Optional[int] = None
 
 
 # Response schemas
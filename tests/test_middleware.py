@@ -0,0 +1,55 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware import StaticCORSMiddleware
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(StaticCORSMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_preflight_is_answered_with_204():
+    response = make_client().options(
+        "/ping",
+        headers={
+            "Origin": "https://example.com",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "authorization, content-type",
+        },
+    )
+    assert response.status_code == 204
+    assert response.content == b""
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.headers["access-control-allow-methods"] == "GET, POST, PUT, DELETE, OPTIONS"
+    assert response.headers["access-control-allow-headers"] == "authorization, content-type"
+    assert response.headers["access-control-max-age"] == "600"
+
+
+def test_preflight_without_requested_headers_allows_any():
+    response = make_client().options(
+        "/ping",
+        headers={"Origin": "https://example.com", "Access-Control-Request-Method": "GET"},
+    )
+    assert response.status_code == 204
+    assert response.headers["access-control-allow-headers"] == "*"
+
+
+def test_simple_response_gets_allow_origin():
+    response = make_client().get("/ping", headers={"Origin": "https://example.com"})
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_plain_options_reaches_the_app():
+    # Without Access-Control-Request-Method it isn't a preflight
+    response = make_client().options("/ping")
+    assert response.status_code == 405
+    assert response.headers["access-control-allow-origin"] == "*"
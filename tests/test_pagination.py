@@ -0,0 +1,48 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from app.routers.notes import _NOTE_PAGE, _NOTE_SUMMARY_PAGE, _dump_page, _note_page
+
+
+def make_notes(*ids):
+    # Keyset queries return rows newest first, so callers pass ids in descending order
+    return [
+        SimpleNamespace(
+            id=note_id,
+            title=f"Note {note_id}",
+            content="content",
+            is_public=True,
+            owner_id=1,
+            created_at=datetime(2024, 1, 1, 12, 0, 0),
+            updated_at=None,
+        )
+        for note_id in ids
+    ]
+
+
+def test_full_page_points_cursor_at_last_item():
+    notes = make_notes(9, 7, 4)
+    page = _note_page(notes, limit=3)
+    assert page["items"] is notes
+    assert page["next_cursor"] == 4
+
+
+def test_short_page_has_no_cursor():
+    assert _note_page(make_notes(9, 7), limit=3)["next_cursor"] is None
+
+
+def test_empty_page_has_no_cursor():
+    assert _note_page([], limit=3) == {"items": [], "next_cursor": None}
+
+
+def test_dumped_page_carries_cursor():
+    body = json.loads(_dump_page(_NOTE_PAGE, make_notes(5, 3), limit=2))
+    assert [item["id"] for item in body["items"]] == [5, 3]
+    assert body["next_cursor"] == 3
+    assert body["items"][0]["created_at"] == "2024-01-01T12:00:00"
+
+
+def test_dumped_summary_page_omits_content():
+    body = json.loads(_dump_page(_NOTE_SUMMARY_PAGE, make_notes(5), limit=10))
+    assert body["next_cursor"] is None
+    assert set(body["items"][0]) == {"id", "title", "is_public", "created_at"}
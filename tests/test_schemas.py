@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+from app.schemas import UserCreate, UserUpdate
+
+
+@pytest.mark.parametrize(
+    "email, expected",
+    [
+        ("user@example.com", "user@example.com"),
+        ("First.Last+tag@Example.COM", "First.Last+tag@example.com"),
+        ("a@b.co", "a@b.co"),
+    ],
+)
+def test_ascii_email_is_accepted_with_lowercased_domain(email, expected):
+    user = UserCreate(email=email, username="testuser", password="password123")
+    assert user.email == expected
+
+
+@pytest.mark.parametrize(
+    "email",
+    ["no-at", "a@b", "a@@b.com", "@example.com", "user@", "us er@example.com", ""],
+)
+def test_invalid_ascii_email_is_rejected(email):
+    with pytest.raises(ValidationError, match="valid email address"):
+        UserCreate(email=email, username="testuser", password="password123")
+
+
+def test_internationalized_email_goes_through_email_validator():
+    user = UserCreate(email="josé@Bücher.example", username="testuser", password="password123")
+    assert user.email == "josé@bücher.example"
+
+
+def test_invalid_internationalized_email_is_rejected():
+    with pytest.raises(ValidationError, match="valid email address"):
+        UserCreate(email="josé@", username="testuser", password="password123")
+
+
+def test_non_string_email_is_rejected():
+    with pytest.raises(ValidationError):
+        UserCreate(email=123, username="testuser", password="password123")
+
+
+def test_update_email_is_optional_and_validated():
+    assert UserUpdate().email is None
+    assert UserUpdate(email="User@Example.com").email == "User@example.com"
+    with pytest.raises(ValidationError):
+        UserUpdate(email="not-an-email")